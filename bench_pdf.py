@@ -0,0 +1,101 @@
+import argparse
+import importlib.util
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+from io import BytesIO
+from pathlib import Path
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PARENT_DIR = CURRENT_DIR.parent
+
+if str(PARENT_DIR) not in sys.path:
+    sys.path.insert(0, str(PARENT_DIR))
+
+from app.services.fonts import HELVETICA, register_fonts
+from app.services.pdf import render_receipt_pdf
+from app.services.regenerate import ItemSnapshot, ReceiptSnapshot, SettingsSnapshot
+
+SETTINGS = SettingsSnapshot(
+    school_name="Ṣàngó Memorial College",
+    school_address="12 Adeola Odeku Street, Lagos",
+    school_contact="+234 800 000 0000",
+    currency_symbol="₦",
+    footer_text="Thank you for your payment.",
+    default_pdf_folder="",
+)
+
+
+FIRST_NAMES = ("Chiamaka", "Adébáyọ̀", "Ngozi", "Oluwaseun", "Émeka", "Fatima", "Tolu", "Ifeoma")
+LAST_NAMES = ("Ọ̀kàfọ̀r", "Bello", "Adéwálé", "Eze", "Nwosu", "Ògúnlẹ́yẹ", "Musa", "Okonkwo")
+ITEM_NAMES = ("School fees", "Uniform", "Textbooks", "Bus levy", "PTA dues", "Exam fee", "Lab fee")
+
+
+def sample_receipts(count: int, item_count: int, seed: int = 0) -> list[ReceiptSnapshot]:
+    # Names and amounts differ per receipt so each render draws its own glyph set,
+    # as real traffic does, rather than repeating one document.
+    rng = random.Random(seed)
+    receipts = []
+    for index in range(count):
+        items = tuple(
+            ItemSnapshot(
+                item_name=f"{rng.choice(ITEM_NAMES)} — term {rng.randint(1, 3)}",
+                amount_cents=rng.randint(500, 50_000_000),
+            )
+            for _ in range(item_count)
+        )
+        receipts.append(
+            ReceiptSnapshot(
+                id=index + 1,
+                receipt_number=f"RCPT-2026-{index + 1:04d}",
+                student_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+                student_class=f"JSS {rng.randint(1, 3)}",
+                department=rng.choice(("Science", "Arts", "Commercial", "")),
+                total_cents=sum(item.amount_cents for item in items),
+                created_at=datetime(2026, 1, 1, 9, 30),
+                items=items,
+            )
+        )
+    return receipts
+
+
+def bench(label: str, receipts: list[ReceiptSnapshot], fonts) -> float:
+    timings = []
+    sizes = []
+    for receipt in receipts:
+        buffer = BytesIO()
+        started = time.perf_counter()
+        render_receipt_pdf(receipt, SETTINGS, buffer, fonts=fonts)
+        timings.append(time.perf_counter() - started)
+        sizes.append(len(buffer.getvalue()))
+    median = statistics.median(timings)
+    p95 = sorted(timings)[max(int(len(timings) * 0.95) - 1, 0)]
+    print(
+        f"{label:<10} median {median * 1000:7.2f} ms   p95 {p95 * 1000:7.2f} ms"
+        f"   {statistics.mean(sizes) / 1024:6.1f} KiB avg"
+    )
+    return median
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark receipt PDF rendering per font set.")
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--items", type=int, default=10)
+    args = parser.parse_args()
+
+    accelerated = importlib.util.find_spec("_rl_accel") is not None
+    print(f"reportlab C accelerator (rl_accel): {'installed' if accelerated else 'not installed'}")
+    started = time.perf_counter()
+    fonts = register_fonts()
+    print(f"font registration (once per process): {(time.perf_counter() - started) * 1000:.2f} ms")
+
+    receipts = sample_receipts(max(args.rounds, 1), args.items)
+    baseline = bench("Helvetica", receipts, HELVETICA)
+    ttf = bench(fonts.regular, receipts, fonts)
+    print(f"{fonts.regular} / Helvetica: {ttf / baseline:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,13 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any
 
-from sqlalchemy import and_, or_, select, text
+from sqlalchemy import and_, delete, or_, select, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session, joinedload
 
 from app import models, schemas
+from app.services.idempotency import IdempotencyConflict
+from app.services.item_index import item_index
 from app.services.paths import ensure_app_dirs
 
 
@@ -29,16 +32,90 @@ def init_db_defaults(db: Session) -> None:
         db.commit()
 
 
+SETTINGS_COLUMN_MIGRATIONS = {
+    "currency_symbol": "ALTER TABLE settings ADD COLUMN currency_symbol VARCHAR(8) DEFAULT '₦'",
+    "pdf_storage_mode": (
+        "ALTER TABLE settings ADD COLUMN pdf_storage_mode VARCHAR(20) DEFAULT 'persisted'"
+    ),
+    "profiling_enabled": "ALTER TABLE settings ADD COLUMN profiling_enabled BOOLEAN DEFAULT 0",
+    "profiling_sample_rate": (
+        "ALTER TABLE settings ADD COLUMN profiling_sample_rate FLOAT DEFAULT 0.1"
+    ),
+    "backup_enabled": "ALTER TABLE settings ADD COLUMN backup_enabled BOOLEAN DEFAULT 1",
+    "backup_interval_minutes": (
+        "ALTER TABLE settings ADD COLUMN backup_interval_minutes INTEGER DEFAULT 60"
+    ),
+    "backup_keep": "ALTER TABLE settings ADD COLUMN backup_keep INTEGER DEFAULT 24",
+    "backup_pages_per_step": (
+        "ALTER TABLE settings ADD COLUMN backup_pages_per_step INTEGER DEFAULT 64"
+    ),
+    "backup_step_sleep_ms": (
+        "ALTER TABLE settings ADD COLUMN backup_step_sleep_ms INTEGER DEFAULT 20"
+    ),
+}
+
+
 def ensure_settings_schema(db: Session) -> None:
     table_info = db.execute(text("PRAGMA table_info(settings)")).mappings().all()
     existing_cols = {row["name"] for row in table_info}
-    if "currency_symbol" not in existing_cols:
+    for column, ddl in SETTINGS_COLUMN_MIGRATIONS.items():
+        if column not in existing_cols:
+            db.execute(text(ddl))
+            db.commit()
+
+
+def ensure_item_catalog_schema(db: Session) -> None:
+    table_info = db.execute(text("PRAGMA table_info(receipt_items)")).mappings().all()
+    existing_cols = {row["name"] for row in table_info}
+    if "item_name" not in existing_cols:
+        return
+
+    # Older databases store the free-text name on every row. Intern the names
+    # into the catalog and rebuild receipt_items around item_id.
+    db.execute(
+        text(
+            "INSERT OR IGNORE INTO items (name) "
+            "SELECT DISTINCT item_name FROM receipt_items"
+        )
+    )
+    db.execute(text("ALTER TABLE receipt_items RENAME TO receipt_items_old"))
+    models.ReceiptItem.__table__.create(bind=db.connection())
+    db.execute(
+        text(
+            "INSERT INTO receipt_items (id, receipt_id, item_id, amount_cents) "
+            "SELECT o.id, o.receipt_id, i.id, o.amount_cents "
+            "FROM receipt_items_old o JOIN items i ON i.name = o.item_name"
+        )
+    )
+    db.execute(text("DROP TABLE receipt_items_old"))
+    db.commit()
+
+
+def load_item_index(db: Session) -> None:
+    item_index.load(db.scalars(select(models.Item.name)))
+
+
+def suggest_item_names(db: Session, prefix: str, limit: int) -> list[str]:
+    if not item_index.loaded:
+        load_item_index(db)
+    return item_index.suggest(prefix, limit)
+
+
+def _intern_item_names(db: Session, names: set[str]) -> dict[str, int]:
+    stmt = select(models.Item.name, models.Item.id).where(models.Item.name.in_(names))
+    item_ids = {name: item_id for name, item_id in db.execute(stmt)}
+    missing = names - item_ids.keys()
+    if missing:
+        # A concurrent receipt may intern the same new name first; skipping the
+        # conflicting row and re-reading the ids avoids a UNIQUE failure.
         db.execute(
-            text(
-                "ALTER TABLE settings ADD COLUMN currency_symbol VARCHAR(8) DEFAULT '₦'"
-            )
+            sqlite_insert(models.Item)
+            .values([{"name": name} for name in missing])
+            .on_conflict_do_nothing(index_elements=["name"])
         )
-        db.commit()
+        stmt = select(models.Item.name, models.Item.id).where(models.Item.name.in_(missing))
+        item_ids.update({name: item_id for name, item_id in db.execute(stmt)})
+    return item_ids
 
 
 def get_or_create_settings(db: Session) -> models.Setting:
@@ -85,18 +162,24 @@ def _next_receipt_number(db: Session, year: int) -> str:
     return f"RCPT-{year}-{counter.last_number:04d}"
 
 
-def create_receipt(db: Session, payload: schemas.ReceiptCreate) -> models.Receipt:
+def create_receipt(
+    db: Session,
+    payload: schemas.ReceiptCreate,
+    idempotency_key: str | None = None,
+    request_hash: str = "",
+) -> models.Receipt:
     created_at = datetime.now()
     year = created_at.year
 
-    item_rows: list[dict[str, Any]] = []
-    total_cents = 0
-    for item in payload.items:
-        cents = schemas.normalize_amount_to_cents(item.amount)
-        total_cents += cents
-        item_rows.append({"item_name": item.item_name.strip(), "amount_cents": cents})
+    item_rows: list[dict[str, Any]] = [
+        {"item_name": item.item_name.strip(), "amount_cents": item.amount_cents}
+        for item in payload.items
+    ]
+    total_cents = payload.total_cents
+    item_names = {row["item_name"] for row in item_rows}
 
     with db.begin():
+        item_ids = _intern_item_names(db, item_names)
         receipt_number = _next_receipt_number(db, year)
         receipt = models.Receipt(
             receipt_number=receipt_number,
@@ -110,12 +193,49 @@ def create_receipt(db: Session, payload: schemas.ReceiptCreate) -> models.Receip
         db.flush()
 
         for row in item_rows:
-            db.add(models.ReceiptItem(receipt_id=receipt.id, **row))
+            db.add(
+                models.ReceiptItem(
+                    receipt_id=receipt.id,
+                    item_id=item_ids[row["item_name"]],
+                    amount_cents=row["amount_cents"],
+                )
+            )
 
+        if idempotency_key:
+            db.add(
+                models.IdempotencyKey(
+                    key=idempotency_key,
+                    request_hash=request_hash,
+                    receipt_id=receipt.id,
+                )
+            )
+
+    if item_index.loaded:
+        for name in item_names:
+            item_index.add(name)
     db.refresh(receipt)
     return get_receipt_or_404(db, receipt.id)
 
 
+def get_idempotent_receipt(
+    db: Session, idempotency_key: str, request_hash: str
+) -> models.Receipt | None:
+    # Keep the lookup in its own transaction so create_receipt can begin a fresh one.
+    with db.begin():
+        record = db.get(models.IdempotencyKey, idempotency_key)
+        if not record:
+            return None
+        if record.request_hash != request_hash:
+            raise IdempotencyConflict("Idempotency-Key was already used for a different receipt")
+        receipt_id = record.receipt_id
+    return get_receipt_or_404(db, receipt_id)
+
+
+def prune_idempotency_keys(db: Session, older_than: datetime) -> None:
+    db.execute(delete(models.IdempotencyKey).where(models.IdempotencyKey.created_at < older_than))
+    db.commit()
+
+
 def get_receipt_or_404(db: Session, receipt_id: int) -> models.Receipt:
     stmt = (
         select(models.Receipt)
@@ -160,12 +280,23 @@ def list_receipts(
     return list(db.scalars(stmt).all())
 
 
+def set_receipt_pdf_path(db: Session, receipt_id: int, pdf_path: str) -> bool:
+    receipt = db.get(models.Receipt, receipt_id)
+    if not receipt:
+        return False
+    receipt.pdf_path = pdf_path
+    db.add(receipt)
+    db.commit()
+    return True
+
+
 def delete_receipt(db: Session, receipt_id: int) -> None:
     receipt = db.get(models.Receipt, receipt_id)
     if not receipt:
         raise ValueError("Receipt not found")
 
     pdf_path = receipt.pdf_path
+    db.execute(delete(models.IdempotencyKey).where(models.IdempotencyKey.receipt_id == receipt_id))
     db.delete(receipt)
     db.commit()
 
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
+import hashlib
 import logging
 import socket
 import sys
 import threading
 import webbrowser
+from datetime import datetime, timedelta
 from pathlib import Path
 
 # Allow running directly from the app directory: `cd app && python main.py`
@@ -12,15 +14,26 @@ if __package__ in {None, ""}:
     sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 import uvicorn
-from fastapi import Depends, FastAPI, HTTPException, Query
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import BackgroundTasks, Depends, FastAPI, Header, HTTPException, Query
+from fastapi.responses import FileResponse, JSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from sqlalchemy.orm import Session
 
-from app import crud, schemas
+from app import crud, models, schemas
 from app.db import Base, SessionLocal, engine, get_db
+from app.services.backup import backup_service
+from app.services.fonts import register_fonts
+from app.services.idempotency import IdempotencyConflict, idempotency_cache
 from app.services.paths import ensure_app_dirs, static_dir
-from app.services.pdf import generate_receipt_pdf
+from app.services.pdf import receipt_pdf_path, render_receipt_pdf_bytes, write_pdf_bytes
+from app.services.pdf_cache import pdf_cache
+from app.services.profiling import (
+    ProfiledRoute,
+    ProfilingMiddleware,
+    capture_path,
+    list_captures,
+    profiler,
+)
 
 paths = ensure_app_dirs()
 
@@ -35,20 +48,86 @@ logging.basicConfig(
 logger = logging.getLogger("receipt_app")
 
 app = FastAPI(title="Offline Receipt Generator", docs_url=None, redoc_url=None)
+app.router.route_class = ProfiledRoute
+app.add_middleware(ProfilingMiddleware)
+
+
+def _write_pdf_behind(receipt_id: int, pdf_path: Path, data: bytes) -> None:
+    try:
+        write_pdf_bytes(pdf_path, data)
+    except Exception:
+        logger.exception("Failed to write PDF for receipt %s", receipt_id)
+        return
+    # Re-stamp the cached bytes so the new file does not look newer than them.
+    pdf_cache.put(receipt_id, data)
+    db = SessionLocal()
+    try:
+        if not crud.set_receipt_pdf_path(db, receipt_id, str(pdf_path)):
+            # Receipt was deleted while the write was pending.
+            pdf_path.unlink(missing_ok=True)
+    finally:
+        db.close()
+
+
+def store_receipt_pdf(
+    receipt: models.Receipt,
+    settings: models.Setting,
+    background_tasks: BackgroundTasks,
+) -> bytes:
+    data = render_receipt_pdf_bytes(receipt, settings)
+
+    mode = settings.pdf_storage_mode or "persisted"
+    if mode == "memory":
+        # Drop the now-stale disk copy; once pdf_path is blank nothing else
+        # would ever remove it.
+        if receipt.pdf_path:
+            Path(receipt.pdf_path).unlink(missing_ok=True)
+        receipt.pdf_path = ""
+    elif mode == "write_behind":
+        background_tasks.add_task(
+            _write_pdf_behind, receipt.id, receipt_pdf_path(receipt, settings), data
+        )
+    else:
+        receipt.pdf_path = str(write_pdf_bytes(receipt_pdf_path(receipt, settings), data))
+    # Cache after any disk write so the file's mtime is not newer than the entry.
+    pdf_cache.put(receipt.id, data)
+    return data
+
+
+def configure_services(settings: models.Setting) -> None:
+    profiler.configure(settings.profiling_enabled, settings.profiling_sample_rate)
+    backup_service.configure(
+        enabled=settings.backup_enabled,
+        interval_minutes=settings.backup_interval_minutes,
+        keep=settings.backup_keep,
+        pages_per_step=settings.backup_pages_per_step,
+        step_sleep_ms=settings.backup_step_sleep_ms,
+    )
 
 
 @app.on_event("startup")
 def on_startup() -> None:
+    register_fonts()
     Base.metadata.create_all(bind=engine)
     db = SessionLocal()
     try:
         crud.ensure_settings_schema(db)
+        crud.ensure_item_catalog_schema(db)
         crud.init_db_defaults(db)
+        configure_services(crud.get_or_create_settings(db))
+        crud.load_item_index(db)
+        crud.prune_idempotency_keys(db, datetime.utcnow() - timedelta(days=1))
     finally:
         db.close()
+    backup_service.start()
     logger.info("Application startup complete")
 
 
+@app.on_event("shutdown")
+def on_shutdown() -> None:
+    backup_service.stop()
+
+
 @app.get("/api/health")
 def health() -> dict[str, str]:
     return {"status": "ok"}
@@ -61,24 +140,35 @@ def get_settings(db: Session = Depends(get_db)):
 
 @app.put("/api/settings", response_model=schemas.SettingsOut)
 def update_settings(payload: schemas.SettingsIn, db: Session = Depends(get_db)):
-    return crud.update_settings(db, payload)
-
-
-@app.post("/api/receipts")
-def create_receipt(payload: schemas.ReceiptCreate, db: Session = Depends(get_db)):
+    setting = crud.update_settings(db, payload)
+    pdf_cache.clear()
+    configure_services(setting)
+    return setting
+
+
+def _receipt_created_response(receipt: models.Receipt) -> dict:
+    return {
+        "message": "Receipt generated successfully",
+        "receipt": crud.as_receipt_out(receipt),
+        "pdf_url": f"/api/receipts/{receipt.id}/pdf",
+    }
+
+
+def _create_receipt(
+    payload: schemas.ReceiptCreate,
+    background_tasks: BackgroundTasks,
+    db: Session,
+    idempotency_key: str | None = None,
+    request_hash: str = "",
+) -> dict:
     try:
-        receipt = crud.create_receipt(db, payload)
+        receipt = crud.create_receipt(db, payload, idempotency_key, request_hash)
         settings = crud.get_or_create_settings(db)
-        pdf_path = generate_receipt_pdf(receipt, settings)
-        receipt.pdf_path = str(pdf_path)
+        store_receipt_pdf(receipt, settings, background_tasks)
         db.add(receipt)
         db.commit()
         db.refresh(receipt)
-        return {
-            "message": "Receipt generated successfully",
-            "receipt": crud.as_receipt_out(receipt),
-            "pdf_url": f"/api/receipts/{receipt.id}/pdf",
-        }
+        return _receipt_created_response(receipt)
     except ValueError as exc:
         logger.exception("Validation error while creating receipt")
         raise HTTPException(status_code=400, detail=str(exc)) from exc
@@ -87,6 +177,39 @@ def create_receipt(payload: schemas.ReceiptCreate, db: Session = Depends(get_db)
         raise HTTPException(status_code=500, detail="Could not generate receipt") from exc
 
 
+def _replay_receipt(db: Session, idempotency_key: str, request_hash: str) -> dict | None:
+    receipt = crud.get_idempotent_receipt(db, idempotency_key, request_hash)
+    if receipt is None:
+        return None
+    logger.info("Replaying receipt %s for Idempotency-Key", receipt.receipt_number)
+    return _receipt_created_response(receipt)
+
+
+@app.post("/api/receipts")
+def create_receipt(
+    payload: schemas.ReceiptCreate,
+    background_tasks: BackgroundTasks,
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=100),
+    db: Session = Depends(get_db),
+):
+    if not idempotency_key:
+        return _create_receipt(payload, background_tasks, db)
+
+    request_hash = hashlib.sha256(payload.model_dump_json().encode("utf-8")).hexdigest()
+    try:
+        return idempotency_cache.get_or_run(
+            idempotency_key,
+            request_hash,
+            lookup=lambda: _replay_receipt(db, idempotency_key, request_hash),
+            create=lambda: _create_receipt(
+                payload, background_tasks, db, idempotency_key, request_hash
+            ),
+            owner_of=lambda response: response["receipt"].id,
+        )
+    except IdempotencyConflict as exc:
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+
 @app.get("/api/receipts")
 def list_receipts(
     search: str | None = Query(default=None),
@@ -115,6 +238,8 @@ def get_receipt(receipt_id: int, db: Session = Depends(get_db)):
 def delete_receipt(receipt_id: int, db: Session = Depends(get_db)):
     try:
         crud.delete_receipt(db, receipt_id)
+        pdf_cache.invalidate(receipt_id)
+        idempotency_cache.discard_owner(receipt_id)
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
     except Exception as exc:
@@ -124,37 +249,52 @@ def delete_receipt(receipt_id: int, db: Session = Depends(get_db)):
 
 
 @app.post("/api/receipts/{receipt_id}/regenerate")
-def regenerate_pdf(receipt_id: int, db: Session = Depends(get_db)):
+def regenerate_pdf(
+    receipt_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
     try:
         receipt = crud.get_receipt_or_404(db, receipt_id)
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
 
     settings = crud.get_or_create_settings(db)
-    pdf_path = generate_receipt_pdf(receipt, settings)
-    receipt.pdf_path = str(pdf_path)
+    store_receipt_pdf(receipt, settings, background_tasks)
     db.add(receipt)
     db.commit()
     return {"message": "PDF regenerated", "pdf_url": f"/api/receipts/{receipt.id}/pdf"}
 
 
 @app.get("/api/receipts/{receipt_id}/pdf")
-def get_pdf(receipt_id: int, db: Session = Depends(get_db)):
+def get_pdf(
+    receipt_id: int,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db),
+):
     try:
         receipt = crud.get_receipt_or_404(db, receipt_id)
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc)) from exc
 
     pdf_path = Path(receipt.pdf_path) if receipt.pdf_path else None
-    if not pdf_path or not pdf_path.exists():
-        settings = crud.get_or_create_settings(db)
-        pdf_path = generate_receipt_pdf(receipt, settings)
-        receipt.pdf_path = str(pdf_path)
-        db.add(receipt)
-        db.commit()
-
-    return FileResponse(
-        path=pdf_path,
+    try:
+        modified_at = pdf_path.stat().st_mtime if pdf_path else None
+    except OSError:
+        modified_at = None
+    data = pdf_cache.get(receipt.id, modified_at)
+    if data is None:
+        if modified_at is not None:
+            data = pdf_path.read_bytes()
+            pdf_cache.put(receipt.id, data)
+        else:
+            settings = crud.get_or_create_settings(db)
+            data = store_receipt_pdf(receipt, settings, background_tasks)
+            db.add(receipt)
+            db.commit()
+
+    return Response(
+        content=data,
         media_type="application/pdf",
         headers={
             "Content-Disposition": f'inline; filename="{receipt.receipt_number}.pdf"'
@@ -162,6 +302,15 @@ def get_pdf(receipt_id: int, db: Session = Depends(get_db)):
     )
 
 
+@app.get("/api/items/suggest")
+def suggest_items(
+    q: str = Query(default="", max_length=200),
+    limit: int = Query(default=10, ge=1, le=50),
+    db: Session = Depends(get_db),
+):
+    return crud.suggest_item_names(db, q.strip(), limit)
+
+
 @app.get("/api/receipts/{receipt_id}/export")
 def export_receipt(receipt_id: int, db: Session = Depends(get_db)):
     try:
@@ -171,6 +320,50 @@ def export_receipt(receipt_id: int, db: Session = Depends(get_db)):
     return JSONResponse(content=crud.export_receipt_json(receipt))
 
 
+@app.get("/api/profiles")
+def get_profiles():
+    return list_captures()
+
+
+@app.get("/api/profiles/{name}")
+def download_profile(name: str):
+    try:
+        path = capture_path(name)
+    except ValueError as exc:
+        raise HTTPException(status_code=404, detail=str(exc)) from exc
+    return FileResponse(path=path, media_type="application/octet-stream", filename=name)
+
+
+@app.get("/api/backups", response_model=schemas.BackupStatusOut)
+def get_backups():
+    snapshots = []
+    for path in backup_service.list_snapshots():
+        stat = path.stat()
+        snapshots.append(
+            schemas.BackupSnapshotOut(
+                name=path.name,
+                size=stat.st_size,
+                created_at=datetime.fromtimestamp(stat.st_mtime),
+            )
+        )
+    return schemas.BackupStatusOut(status=backup_service.status(), snapshots=snapshots)
+
+
+@app.post("/api/backups", status_code=202)
+def start_backup():
+    if not backup_service.start_backup():
+        raise HTTPException(status_code=409, detail="A backup is already running")
+    return {"message": "Backup started"}
+
+
+@app.get("/api/backups/{name}")
+def download_backup(name: str):
+    path = next((p for p in backup_service.list_snapshots() if p.name == name), None)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Backup not found")
+    return FileResponse(path=path, media_type="application/gzip", filename=name)
+
+
 def find_free_port(host: str = "127.0.0.1") -> int:
     with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
         sock.bind((host, 0))
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from datetime import datetime
 
-from sqlalchemy import DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, DateTime, Float, ForeignKey, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db import Base
@@ -20,6 +20,14 @@ class Setting(Base):
         String(250), default="Thank you for your payment."
     )
     default_pdf_folder: Mapped[str] = mapped_column(String(500), default="")
+    pdf_storage_mode: Mapped[str] = mapped_column(String(20), default="persisted")
+    profiling_enabled: Mapped[bool] = mapped_column(Boolean, default=False)
+    profiling_sample_rate: Mapped[float] = mapped_column(Float, default=0.1)
+    backup_enabled: Mapped[bool] = mapped_column(Boolean, default=True)
+    backup_interval_minutes: Mapped[int] = mapped_column(Integer, default=60)
+    backup_keep: Mapped[int] = mapped_column(Integer, default=24)
+    backup_pages_per_step: Mapped[int] = mapped_column(Integer, default=64)
+    backup_step_sleep_ms: Mapped[int] = mapped_column(Integer, default=20)
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 
@@ -47,12 +55,33 @@ class Receipt(Base):
     )
 
 
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key: Mapped[str] = mapped_column(String(100), primary_key=True)
+    request_hash: Mapped[str] = mapped_column(String(64))
+    receipt_id: Mapped[int] = mapped_column(ForeignKey("receipts.id", ondelete="CASCADE"))
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, index=True)
+
+
+class Item(Base):
+    __tablename__ = "items"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    name: Mapped[str] = mapped_column(String(200), unique=True, index=True)
+
+
 class ReceiptItem(Base):
     __tablename__ = "receipt_items"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     receipt_id: Mapped[int] = mapped_column(ForeignKey("receipts.id", ondelete="CASCADE"))
-    item_name: Mapped[str] = mapped_column(String(200))
+    item_id: Mapped[int] = mapped_column(ForeignKey("items.id"), index=True)
     amount_cents: Mapped[int] = mapped_column(Integer)
 
     receipt: Mapped[Receipt] = relationship("Receipt", back_populates="items")
+    item: Mapped[Item] = relationship("Item", lazy="joined")
+
+    @property
+    def item_name(self) -> str:
+        return self.item.name
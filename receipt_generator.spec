@@ -2,7 +2,7 @@
 
 from PyInstaller.utils.hooks import collect_submodules
 
-hiddenimports = collect_submodules("reportlab")
+hiddenimports = collect_submodules("reportlab") + ["_rl_accel"]
 
 
 a = Analysis(
@@ -0,0 +1,79 @@
+import argparse
+import logging
+import multiprocessing
+import sys
+from pathlib import Path
+
+CURRENT_DIR = Path(__file__).resolve().parent
+PARENT_DIR = CURRENT_DIR.parent
+
+if str(PARENT_DIR) not in sys.path:
+    sys.path.insert(0, str(PARENT_DIR))
+
+from app import crud
+from app.db import Base, SessionLocal, engine
+from app.services.paths import ensure_app_dirs
+from app.services.regenerate import regenerate_all_pdfs
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Regenerate the PDF of every receipt using the current settings."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of render processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=200,
+        help="Receipts loaded from the database and rendered per task (default: 200)",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore any saved checkpoint and start from the first receipt",
+    )
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    paths = ensure_app_dirs()
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
+        handlers=[
+            logging.FileHandler(paths["log_path"], encoding="utf-8"),
+            logging.StreamHandler(sys.stdout),
+        ],
+    )
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        crud.ensure_settings_schema(db)
+        crud.ensure_item_catalog_schema(db)
+        settings = crud.get_or_create_settings(db)
+        regenerate_all_pdfs(
+            db,
+            settings,
+            checkpoint_path=paths["data_dir"] / "regenerate_checkpoint.json",
+            workers=args.workers,
+            chunk_size=max(args.chunk_size, 1),
+            resume=not args.restart,
+        )
+    except KeyboardInterrupt:
+        logging.getLogger("receipt_app").info("Interrupted; run again to resume")
+        return 1
+    finally:
+        db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -2,8 +2,21 @@ from __future__ import annotations
 
 from datetime import datetime
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Literal
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    PrivateAttr,
+    ValidatorFunctionWrapHandler,
+    field_validator,
+    model_validator,
+)
+
+# Longest whole part the integer fast path accepts; longer values take the
+# Decimal path, which raises once they exceed the default 28-digit precision.
+_FAST_AMOUNT_MAX_WHOLE_DIGITS = 15
 
 
 def cents_to_currency(cents: int) -> str:
@@ -11,8 +24,22 @@ def cents_to_currency(cents: int) -> str:
 
 
 def normalize_amount_to_cents(value: str | float | int | Decimal) -> int:
+    text = str(value)
+    whole, dot, fraction = text.partition(".")
+    if (
+        whole.isdigit()
+        and whole.isascii()
+        and len(whole) <= _FAST_AMOUNT_MAX_WHOLE_DIGITS
+        and (not dot or (fraction.isdigit() and fraction.isascii()))
+    ):
+        # Plain non-negative decimal: integer arithmetic with ROUND_HALF_UP.
+        cents = int(whole) * 100 + int(fraction[:2].ljust(2, "0"))
+        if len(fraction) > 2 and fraction[2] >= "5":
+            cents += 1
+        return cents
+
     try:
-        dec = Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        dec = Decimal(text).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
     except (InvalidOperation, ValueError):
         raise ValueError("Amount must be numeric")
 
@@ -21,10 +48,19 @@ def normalize_amount_to_cents(value: str | float | int | Decimal) -> int:
     return int(dec * 100)
 
 
+PdfStorageMode = Literal["persisted", "memory", "write_behind"]
+
+
 class ReceiptItemCreate(BaseModel):
     item_name: str = Field(min_length=1, max_length=200)
     amount: str
 
+    _amount_cents: int = PrivateAttr(default=0)
+
+    @property
+    def amount_cents(self) -> int:
+        return self._amount_cents
+
     @field_validator("item_name")
     @classmethod
     def validate_item_name(cls, value: str) -> str:
@@ -39,6 +75,15 @@ class ReceiptItemCreate(BaseModel):
         normalize_amount_to_cents(value)
         return value
 
+    @model_validator(mode="wrap")
+    @classmethod
+    def cache_amount_cents(cls, data: object, handler: ValidatorFunctionWrapHandler) -> ReceiptItemCreate:
+        # Field validators report every failing field together; the cents are
+        # only derived once the whole item is valid, so crud never re-parses.
+        item = handler(data)
+        item._amount_cents = normalize_amount_to_cents(item.amount)
+        return item
+
 
 class ReceiptCreate(BaseModel):
     student_name: str = Field(min_length=1, max_length=200)
@@ -46,6 +91,10 @@ class ReceiptCreate(BaseModel):
     department: str = Field(default="", max_length=200)
     items: list[ReceiptItemCreate] = Field(min_length=1)
 
+    @property
+    def total_cents(self) -> int:
+        return sum(item.amount_cents for item in self.items)
+
     @field_validator("student_name", "student_class", mode="before")
     @classmethod
     def strip_required(cls, value: str) -> str:
@@ -104,6 +153,14 @@ class SettingsIn(BaseModel):
     currency_symbol: str = Field(default="₦", min_length=1, max_length=3)
     footer_text: str = Field(default="", max_length=250)
     default_pdf_folder: str = Field(default="", max_length=500)
+    pdf_storage_mode: PdfStorageMode = "persisted"
+    profiling_enabled: bool = False
+    profiling_sample_rate: float = Field(default=0.1, ge=0, le=1)
+    backup_enabled: bool = True
+    backup_interval_minutes: int = Field(default=60, ge=5, le=1440)
+    backup_keep: int = Field(default=24, ge=1, le=500)
+    backup_pages_per_step: int = Field(default=64, ge=1, le=100000)
+    backup_step_sleep_ms: int = Field(default=20, ge=0, le=5000)
 
     @field_validator("school_name")
     @classmethod
@@ -125,6 +182,17 @@ class SettingsIn(BaseModel):
         return value.strip()
 
 
+class BackupSnapshotOut(BaseModel):
+    name: str
+    size: int
+    created_at: datetime
+
+
+class BackupStatusOut(BaseModel):
+    status: dict
+    snapshots: list[BackupSnapshotOut]
+
+
 class SettingsOut(SettingsIn):
     id: int
 
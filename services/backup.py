@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import logging
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from app.services.paths import ensure_app_dirs
+
+logger = logging.getLogger("receipt_app.backup")
+
+SNAPSHOT_PREFIX = "receipts-"
+SNAPSHOT_SUFFIX = ".db.gz"
+_COPY_CHUNK_SIZE = 1024 * 1024
+# Stepped copies start over whenever another connection writes to the source.
+# After this many restarts the database is copied in one step under a single read lock.
+MAX_BACKUP_RESTARTS = 3
+
+
+class _TooManyRestarts(Exception):
+    pass
+
+
+def _sha256(path: Path, opener: Any = open) -> str:
+    digest = hashlib.sha256()
+    with opener(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(_COPY_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BackupService:
+    def __init__(self, db_path: Path, backup_dir: Path):
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.enabled = False
+        self.interval_minutes = 60
+        self.keep = 24
+        self.pages_per_step = 64
+        self.step_sleep_ms = 20
+        self._status: dict[str, Any] = {"state": "idle"}
+        self._run_lock = threading.Lock()
+        self._status_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def configure(
+        self,
+        enabled: bool,
+        interval_minutes: int,
+        keep: int,
+        pages_per_step: int,
+        step_sleep_ms: int,
+    ) -> None:
+        self.enabled = enabled
+        self.interval_minutes = max(interval_minutes, 1)
+        self.keep = max(keep, 1)
+        self.pages_per_step = max(pages_per_step, 1)
+        self.step_sleep_ms = max(step_sleep_ms, 0)
+        self._wake.set()
+
+    def status(self) -> dict[str, Any]:
+        with self._status_lock:
+            return dict(self._status)
+
+    def _set_status(self, **values: Any) -> None:
+        with self._status_lock:
+            self._status.update(values)
+
+    def list_snapshots(self) -> list[Path]:
+        return sorted(
+            self.backup_dir.glob(f"{SNAPSHOT_PREFIX}*{SNAPSHOT_SUFFIX}"), reverse=True
+        )
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_scheduler, name="backup-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run_scheduler(self) -> None:
+        while not self._stop.is_set():
+            self._wake.clear()
+            if self.enabled and self._is_due():
+                try:
+                    self.run_backup()
+                except Exception:
+                    logger.exception("Scheduled backup failed")
+            self._wake.wait(timeout=60)
+
+    def _is_due(self) -> bool:
+        snapshots = self.list_snapshots()
+        if not snapshots:
+            return self.db_path.exists()
+        newest = snapshots[0].stat().st_mtime
+        if time.time() - newest < self.interval_minutes * 60:
+            return False
+        # Nothing to back up if the ledger has not changed since the last snapshot.
+        return self.db_path.stat().st_mtime > newest
+
+    def start_backup(self) -> bool:
+        if self._run_lock.locked():
+            return False
+        threading.Thread(target=self._run_backup_logged, name="backup-manual", daemon=True).start()
+        return True
+
+    def _run_backup_logged(self) -> None:
+        try:
+            self.run_backup()
+        except Exception:
+            logger.exception("Manual backup failed")
+
+    def run_backup(self) -> Path | None:
+        if not self._run_lock.acquire(blocking=False):
+            return None
+        try:
+            return self._run_backup()
+        except Exception as exc:
+            self._set_status(state="failed", error=str(exc), finished_at=datetime.now().isoformat())
+            raise
+        finally:
+            self._run_lock.release()
+
+    def _run_backup(self) -> Path:
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        raw_path = self.backup_dir / f"{SNAPSHOT_PREFIX}{stamp}.db.tmp"
+        gz_tmp_path = self.backup_dir / f"{SNAPSHOT_PREFIX}{stamp}{SNAPSHOT_SUFFIX}.tmp"
+        snapshot_path = self.backup_dir / f"{SNAPSHOT_PREFIX}{stamp}{SNAPSHOT_SUFFIX}"
+        started = time.perf_counter()
+        self._set_status(
+            state="running",
+            phase="copying",
+            started_at=datetime.now().isoformat(),
+            finished_at=None,
+            pages_total=None,
+            pages_remaining=None,
+            restarts=0,
+            error=None,
+        )
+        sleep_seconds = self.step_sleep_ms / 1000
+        restarts = 0
+        last_remaining: int | None = None
+
+        def _progress(_status: int, remaining: int, total: int) -> None:
+            nonlocal restarts, last_remaining
+            # Within one pass every step copies pages, so a count that does not
+            # shrink means a write elsewhere made sqlite start the copy over.
+            if last_remaining is not None and remaining >= last_remaining:
+                restarts += 1
+                self._set_status(restarts=restarts)
+                if restarts >= MAX_BACKUP_RESTARTS:
+                    raise _TooManyRestarts
+            last_remaining = remaining
+            self._set_status(pages_total=total, pages_remaining=remaining)
+            # sqlite3 only sleeps on busy/locked steps; pausing after every step
+            # leaves the database free for receipt writes between page batches.
+            if sleep_seconds and remaining:
+                time.sleep(sleep_seconds)
+
+        try:
+            source = sqlite3.connect(self.db_path)
+            target = sqlite3.connect(raw_path)
+            try:
+                with target:
+                    try:
+                        source.backup(target, pages=self.pages_per_step, progress=_progress)
+                    except _TooManyRestarts:
+                        logger.info("Backup restarted %d times; finishing in one step", restarts)
+                        source.backup(target, pages=-1)
+                        self._set_status(pages_remaining=0)
+                self._set_status(phase="verifying")
+                result = target.execute("PRAGMA integrity_check").fetchone()[0]
+                if result != "ok":
+                    raise RuntimeError(f"Snapshot failed integrity check: {result}")
+            finally:
+                target.close()
+                source.close()
+
+            self._set_status(phase="compressing")
+            raw_digest = _sha256(raw_path)
+            with open(raw_path, "rb") as src, gzip.open(gz_tmp_path, "wb", compresslevel=6) as dst:
+                shutil.copyfileobj(src, dst, _COPY_CHUNK_SIZE)
+            if _sha256(gz_tmp_path, gzip.open) != raw_digest:
+                raise RuntimeError("Compressed snapshot does not match the database copy")
+            gz_tmp_path.replace(snapshot_path)
+        finally:
+            raw_path.unlink(missing_ok=True)
+            gz_tmp_path.unlink(missing_ok=True)
+
+        self._rotate()
+        elapsed = time.perf_counter() - started
+        self._set_status(
+            state="done",
+            phase=None,
+            finished_at=datetime.now().isoformat(),
+            last_snapshot=snapshot_path.name,
+            last_duration_seconds=round(elapsed, 2),
+        )
+        logger.info("Backup %s written in %.2fs", snapshot_path.name, elapsed)
+        return snapshot_path
+
+    def _rotate(self) -> None:
+        for stale in self.list_snapshots()[self.keep:]:
+            stale.unlink(missing_ok=True)
+
+
+_paths = ensure_app_dirs()
+backup_service = BackupService(_paths["db_path"], _paths["backup_dir"])
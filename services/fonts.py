@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from reportlab.pdfbase import pdfdoc, pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFError, TTFont, makeToUnicodeCMap
+
+from app.services.paths import static_dir
+
+logger = logging.getLogger("receipt_app.fonts")
+
+
+@dataclass(frozen=True)
+class FontSet:
+    regular: str
+    bold: str
+
+
+HELVETICA = FontSet(regular="Helvetica", bold="Helvetica-Bold")
+INTER = FontSet(regular="Inter", bold="Inter-Bold")
+_FONT_FILES = {
+    INTER.regular: "Inter-400.ttf",
+    INTER.bold: "Inter-700.ttf",
+}
+
+# Glyphs every document's first subset starts with, in a fixed order: printable
+# ASCII, Latin-1 letters, the naira sign, dashes and quotes, and the letters and
+# tone marks of Nigerian names. Receipts drawn only from these produce the same
+# glyph list, so the embedded font program is built once and reused.
+BASE_GLYPHS = (
+    "".join(chr(code) for code in range(33, 127))
+    + "".join(chr(code) for code in range(0xC0, 0x100) if code not in (0xD7, 0xF7))
+    + "₦–—‘’“”•…"
+    + "ỌọẸẹṢṣŃńǸǹḾḿ"
+    + "\u0300\u0301\u0304\u0323"
+)
+SUBSET_CACHE_MAX_ITEMS = 32
+
+_lock = threading.Lock()
+_fonts: FontSet | None = None
+
+
+class _TemplateDocument:
+    pass
+
+
+@dataclass(frozen=True)
+class _EmbeddedSubset:
+    widths: bytes
+    to_unicode: bytes
+    font_program: bytes
+
+
+def _use_deflated(stream: pdfdoc.PDFStream, content: bytes) -> None:
+    # A stream whose dictionary already names its Filter is written as is.
+    stream.content = content
+    stream.dictionary["Filter"] = pdfdoc.PDFArray([pdfdoc.PDFName(pdfdoc.PDFZCompress.pdfname)])
+
+
+class SharedTTFont(TTFont):
+    # A registered TTFont is shared by every document the process renders.
+    # reportlab numbers glyphs in the order a document first draws them, so
+    # each receipt would otherwise embed a different subset and rebuild it.
+    # Seeding every document with BASE_GLYPHS makes the first subset identical
+    # whenever a receipt stays inside that set, so the subset font program,
+    # its widths and its ToUnicode map are built, formatted and deflated once.
+    # The lock also serialises makeSubset, which reads the font through a
+    # shared file position.
+    def __init__(self, name: str, filename: str, subset_cache_size: int = SUBSET_CACHE_MAX_ITEMS):
+        super().__init__(name, filename, asciiReadable=False)
+        template_doc = _TemplateDocument()
+        super().splitString(BASE_GLYPHS, template_doc)
+        self._base_state = self.state.pop(template_doc)
+        self._subset_cache_size = subset_cache_size
+        self._programs: OrderedDict[tuple[int, ...], bytes] = OrderedDict()
+        self._embedded: OrderedDict[tuple[str, tuple[int, ...]], _EmbeddedSubset] = OrderedDict()
+        self._subset_lock = threading.Lock()
+        self._make_subset = self.face.makeSubset
+        self.face.makeSubset = self._cached_make_subset
+
+    def splitString(self, text: str, doc: object, encoding: str = "utf-8") -> list[tuple[int, bytes]]:
+        if doc not in self.state:
+            state = TTFont.State(False, self)
+            state.assignments = dict(self._base_state.assignments)
+            state.subsets = [list(subset) for subset in self._base_state.subsets]
+            state.nextCode = self._base_state.nextCode
+            self.state[doc] = state
+        return super().splitString(text, doc, encoding)
+
+    def addObjects(self, doc: pdfdoc.PDFDocument) -> None:
+        state = self._assignState(doc)
+        subsets = [tuple(subset) for subset in state.subsets]
+        names = [self.getSubsetInternalName(n, doc)[1:] for n in range(len(subsets))]
+        super().addObjects(doc)
+        fonts = doc.idToObject["BasicFonts"].dict
+        for name, subset in zip(names, subsets):
+            pdf_font = fonts[name]
+            embedded = self._embedded_subset(pdf_font.BaseFont, subset)
+            pdf_font.Widths = embedded.widths
+            if doc.compression:
+                _use_deflated(doc.idToObject[f"toUnicodeCMap:{pdf_font.BaseFont}"], embedded.to_unicode)
+                font_file = doc.idToObject[f"fontFile:{self.face.filename}({pdf_font.BaseFont})"]
+                _use_deflated(font_file, embedded.font_program)
+
+    def _embedded_subset(self, base_font_name: str, subset: tuple[int, ...]) -> _EmbeddedSubset:
+        key = (base_font_name, subset)
+        with self._subset_lock:
+            embedded = self._embedded.get(key)
+            if embedded is not None:
+                self._embedded.move_to_end(key)
+                return embedded
+        widths = pdfdoc.PDFArray([self.face.getCharWidth(code) for code in subset])
+        embedded = _EmbeddedSubset(
+            widths=widths.format(None),
+            to_unicode=pdfdoc.PDFZCompress.encode(makeToUnicodeCMap(base_font_name, list(subset))),
+            font_program=pdfdoc.PDFZCompress.encode(self._cached_make_subset(list(subset))),
+        )
+        with self._subset_lock:
+            self._remember(self._embedded, key, embedded)
+        return embedded
+
+    def _cached_make_subset(self, subset: list[int]) -> bytes:
+        key = tuple(subset)
+        with self._subset_lock:
+            data = self._programs.get(key)
+            if data is None:
+                data = self._make_subset(subset)
+                self._remember(self._programs, key, data)
+            else:
+                self._programs.move_to_end(key)
+            return data
+
+    def _remember(self, cache: OrderedDict, key: object, value: object) -> None:
+        cache[key] = value
+        if len(cache) > self._subset_cache_size:
+            cache.popitem(last=False)
+
+
+def register_fonts() -> FontSet:
+    # Parsing a TTF is the expensive part, so it happens once per process.
+    # reportlab then keeps the parsed faces (and their glyph widths) in its
+    # font registry and embeds only the glyphs each document uses.
+    global _fonts
+    if _fonts is not None:
+        return _fonts
+    with _lock:
+        if _fonts is not None:
+            return _fonts
+        fonts_dir = static_dir() / "assets" / "fonts"
+        try:
+            for name, filename in _FONT_FILES.items():
+                if name not in pdfmetrics.getRegisteredFontNames():
+                    pdfmetrics.registerFont(SharedTTFont(name, str(fonts_dir / filename)))
+            pdfmetrics.registerFontFamily(
+                INTER.regular, normal=INTER.regular, bold=INTER.bold
+            )
+            _fonts = INTER
+        except (OSError, TTFError):
+            logger.exception("Could not load bundled fonts; falling back to Helvetica")
+            _fonts = HELVETICA
+        return _fonts
+
+
+def get_fonts() -> FontSet:
+    return _fonts or register_fonts()
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+IDEMPOTENCY_CACHE_MAX_ITEMS = 1024
+IDEMPOTENCY_CACHE_TTL_SECONDS = 15 * 60
+
+
+class IdempotencyConflict(ValueError):
+    pass
+
+
+class IdempotencyCache:
+    def __init__(
+        self,
+        max_items: int = IDEMPOTENCY_CACHE_MAX_ITEMS,
+        ttl_seconds: float = IDEMPOTENCY_CACHE_TTL_SECONDS,
+    ):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, str, Any]] = OrderedDict()
+        self._keys_by_owner: dict[int, set[str]] = {}
+        self._owner_by_key: dict[str, int] = {}
+        self._inflight: dict[str, tuple[str, Future]] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, key: str, fingerprint: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, stored_fingerprint, response = entry
+        if expires_at < time.monotonic():
+            self._evict(key)
+            return None
+        if stored_fingerprint != fingerprint:
+            raise IdempotencyConflict("Idempotency-Key was already used for a different receipt")
+        self._entries.move_to_end(key)
+        return response
+
+    def _evict(self, key: str) -> None:
+        self._entries.pop(key, None)
+        owner_id = self._owner_by_key.pop(key, None)
+        if owner_id is not None:
+            keys = self._keys_by_owner.get(owner_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._keys_by_owner[owner_id]
+
+    def _put(self, key: str, fingerprint: str, response: Any, owner_id: int | None) -> None:
+        self._evict(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, fingerprint, response)
+        if owner_id is not None:
+            self._owner_by_key[key] = owner_id
+            self._keys_by_owner.setdefault(owner_id, set()).add(key)
+        while len(self._entries) > self.max_items:
+            self._evict(next(iter(self._entries)))
+
+    def discard_owner(self, owner_id: int) -> None:
+        with self._lock:
+            for key in list(self._keys_by_owner.get(owner_id, ())):
+                self._evict(key)
+
+    def get_or_run(
+        self,
+        key: str,
+        fingerprint: str,
+        lookup: Callable[[], Any | None],
+        create: Callable[[], Any],
+        owner_of: Callable[[Any], int | None] = lambda response: None,
+    ) -> Any:
+        with self._lock:
+            cached = self._get(key, fingerprint)
+            if cached is not None:
+                return cached
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                future: Future = Future()
+                self._inflight[key] = (fingerprint, future)
+            else:
+                inflight_fingerprint, future = inflight
+
+        if inflight is not None:
+            if inflight_fingerprint != fingerprint:
+                raise IdempotencyConflict("Idempotency-Key was already used for a different receipt")
+            return future.result()
+
+        try:
+            response = lookup()
+            if response is None:
+                response = create()
+        except BaseException as exc:
+            future.set_exception(exc)
+            with self._lock:
+                self._inflight.pop(key, None)
+            raise
+
+        with self._lock:
+            self._put(key, fingerprint, response, owner_of(response))
+            self._inflight.pop(key, None)
+        future.set_result(response)
+        return response
+
+
+idempotency_cache = IdempotencyCache()
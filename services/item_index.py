@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Iterable
+
+_NAMES = ""
+
+
+class ItemTrie:
+    def __init__(self) -> None:
+        self._root: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def _insert(self, name: str) -> None:
+        node = self._root
+        for char in name.casefold():
+            node = node.setdefault(char, {})
+        node.setdefault(_NAMES, set()).add(name)
+
+    def add(self, name: str) -> None:
+        with self._lock:
+            self._insert(name)
+
+    def load(self, names: Iterable[str]) -> None:
+        with self._lock:
+            self._root = {}
+            for name in names:
+                self._insert(name)
+            self.loaded = True
+
+    def suggest(self, prefix: str, limit: int = 10) -> list[str]:
+        with self._lock:
+            node = self._root
+            for char in prefix.casefold():
+                node = node.get(char)
+                if node is None:
+                    return []
+
+            results: list[str] = []
+            stack = [node]
+            while stack and len(results) < limit:
+                current = stack.pop()
+                results.extend(sorted(current.get(_NAMES, ())))
+                stack.extend(
+                    current[char] for char in sorted(current, reverse=True) if char != _NAMES
+                )
+            return results[:limit]
+
+
+item_index = ItemTrie()
@@ -23,8 +23,9 @@ def ensure_app_dirs() -> dict[str, Path]:
     data_dir = root / "data"
     logs_dir = root / "logs"
     pdf_dir = root / "pdfs"
+    backup_dir = root / "backups"
 
-    for folder in (root, data_dir, logs_dir, pdf_dir):
+    for folder in (root, data_dir, logs_dir, pdf_dir, backup_dir):
         folder.mkdir(parents=True, exist_ok=True)
 
     return {
@@ -32,6 +33,7 @@ def ensure_app_dirs() -> dict[str, Path]:
         "data_dir": data_dir,
         "logs_dir": logs_dir,
         "pdf_dir": pdf_dir,
+        "backup_dir": backup_dir,
         "db_path": data_dir / "receipts.db",
         "log_path": logs_dir / "app.log",
     }
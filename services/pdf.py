@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+import os
+import secrets
+from io import BytesIO
 from pathlib import Path
+from typing import BinaryIO
 
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4
@@ -8,6 +12,7 @@ from reportlab.lib.units import mm
 from reportlab.pdfgen import canvas
 
 from app import models
+from app.services.fonts import FontSet, get_fonts
 from app.services.paths import ensure_app_dirs
 
 
@@ -21,12 +26,51 @@ def _resolve_pdf_folder(settings: models.Setting | None) -> Path:
     return folder
 
 
-def generate_receipt_pdf(receipt: models.Receipt, settings: models.Setting | None) -> Path:
+def receipt_pdf_path(receipt: models.Receipt, settings: models.Setting | None) -> Path:
     folder = _resolve_pdf_folder(settings)
     safe_receipt_no = receipt.receipt_number.replace("/", "-").replace(" ", "")
-    filepath = folder / f"{safe_receipt_no}.pdf"
+    return folder / f"{safe_receipt_no}.pdf"
+
+
+def generate_receipt_pdf(receipt: models.Receipt, settings: models.Setting | None) -> Path:
+    filepath = receipt_pdf_path(receipt, settings)
+    render_receipt_pdf(receipt, settings, str(filepath))
+    return filepath
 
-    c = canvas.Canvas(str(filepath), pagesize=A4)
+
+def render_receipt_pdf_bytes(receipt: models.Receipt, settings: models.Setting | None) -> bytes:
+    buffer = BytesIO()
+    render_receipt_pdf(receipt, settings, buffer)
+    return buffer.getvalue()
+
+
+def write_pdf_bytes(filepath: Path, data: bytes) -> Path:
+    filepath.parent.mkdir(parents=True, exist_ok=True)
+    # A unique temp name per writer, so concurrent writes of the same receipt
+    # (write-behind, a re-render, the bulk CLI) never rename each other's file.
+    # O_EXCL with mode 0o666 keeps the umask-derived permissions of a plain
+    # open(), so the renamed PDF stays readable in shared folders.
+    tmp_path = filepath.with_name(f".{filepath.stem}-{secrets.token_hex(8)}.pdf.tmp")
+    flags = os.O_CREAT | os.O_EXCL | os.O_WRONLY | getattr(os, "O_BINARY", 0)
+    fd = os.open(tmp_path, flags, 0o666)
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        tmp_path.replace(filepath)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return filepath
+
+
+def render_receipt_pdf(
+    receipt: models.Receipt,
+    settings: models.Setting | None,
+    target: str | BinaryIO,
+    fonts: FontSet | None = None,
+) -> None:
+    fonts = fonts or get_fonts()
+    c = canvas.Canvas(target, pagesize=A4)
     width, height = A4
 
     margin_x = 20 * mm
@@ -39,11 +83,11 @@ def generate_receipt_pdf(receipt: models.Receipt, settings: models.Setting | Non
     footer_text = settings.footer_text if settings else "Thank you for your payment."
 
     c.setFillColor(colors.HexColor("#0f172a"))
-    c.setFont("Helvetica-Bold", 18)
+    c.setFont(fonts.bold, 18)
     c.drawString(margin_x, y, school_name)
 
     y -= 8 * mm
-    c.setFont("Helvetica", 10)
+    c.setFont(fonts.regular, 10)
     if school_address:
         c.setFillColor(colors.HexColor("#334155"))
         c.drawString(margin_x, y, school_address)
@@ -57,21 +101,21 @@ def generate_receipt_pdf(receipt: models.Receipt, settings: models.Setting | Non
     y -= 10 * mm
 
     c.setFillColor(colors.HexColor("#0f172a"))
-    c.setFont("Helvetica-Bold", 14)
+    c.setFont(fonts.bold, 14)
     c.drawString(margin_x, y, "Payment Receipt")
 
-    c.setFont("Helvetica", 10)
+    c.setFont(fonts.regular, 10)
     issue_date = receipt.created_at.strftime("%Y-%m-%d %H:%M")
     c.drawRightString(width - margin_x, y, f"Receipt No: {receipt.receipt_number}")
     y -= 6 * mm
     c.drawRightString(width - margin_x, y, f"Date: {issue_date}")
     y -= 10 * mm
 
-    c.setFont("Helvetica-Bold", 10)
+    c.setFont(fonts.bold, 10)
     c.drawString(margin_x, y, "Student Information")
     y -= 6 * mm
 
-    c.setFont("Helvetica", 10)
+    c.setFont(fonts.regular, 10)
     c.drawString(margin_x, y, f"Name: {receipt.student_name}")
     y -= 5.5 * mm
     c.drawString(margin_x, y, f"Class: {receipt.student_class}")
@@ -89,16 +133,17 @@ def generate_receipt_pdf(receipt: models.Receipt, settings: models.Setting | Non
     c.rect(table_left, y - 6 * mm, table_right - table_left, 8 * mm, fill=1, stroke=0)
 
     c.setFillColor(colors.HexColor("#0f172a"))
-    c.setFont("Helvetica-Bold", 10)
+    c.setFont(fonts.bold, 10)
     c.drawString(table_left + 4, y - 2 * mm, "Item")
     c.drawRightString(table_right - 4, y - 2 * mm, "Amount")
 
     y -= 10 * mm
-    c.setFont("Helvetica", 10)
+    c.setFont(fonts.regular, 10)
 
     for item in receipt.items:
         if y <= 35 * mm:
             c.showPage()
+            c.setFont(fonts.regular, 10)
             y = height - 20 * mm
         c.setFillColor(colors.HexColor("#111827"))
         c.drawString(table_left + 4, y, item.item_name)
@@ -110,15 +155,14 @@ def generate_receipt_pdf(receipt: models.Receipt, settings: models.Setting | Non
         y -= 7 * mm
 
     y -= 1 * mm
-    c.setFont("Helvetica-Bold", 11)
+    c.setFont(fonts.bold, 11)
     c.setFillColor(colors.HexColor("#0f172a"))
     c.drawString(table_left + 4, y, "Total")
     c.drawRightString(table_right - 4, y, f"{currency_symbol}{receipt.total_cents / 100:,.2f}")
 
     y -= 12 * mm
-    c.setFont("Helvetica", 9)
+    c.setFont(fonts.regular, 9)
     c.setFillColor(colors.HexColor("#475569"))
     c.drawString(margin_x, y, footer_text)
 
     c.save()
-    return filepath
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+
+PDF_CACHE_MAX_ITEMS = 128
+PDF_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+class PdfCache:
+    def __init__(self, max_items: int = PDF_CACHE_MAX_ITEMS, max_bytes: int = PDF_CACHE_MAX_BYTES):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[int, tuple[float, bytes]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, receipt_id: int, modified_at: float | None = None) -> bytes | None:
+        # modified_at is the on-disk copy's mtime; a newer file (e.g. written by
+        # regenerate_pdfs.py) makes the cached bytes stale.
+        with self._lock:
+            entry = self._entries.get(receipt_id)
+            if entry is None:
+                return None
+            cached_at, data = entry
+            if modified_at is not None and modified_at > cached_at:
+                del self._entries[receipt_id]
+                self._size -= len(data)
+                return None
+            self._entries.move_to_end(receipt_id)
+            return data
+
+    def put(self, receipt_id: int, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(receipt_id, None)
+            if previous is not None:
+                self._size -= len(previous[1])
+            self._entries[receipt_id] = (time.time(), data)
+            self._size += len(data)
+            while len(self._entries) > self.max_items or self._size > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def invalidate(self, receipt_id: int) -> None:
+        with self._lock:
+            entry = self._entries.pop(receipt_id, None)
+            if entry is not None:
+                self._size -= len(entry[1])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+pdf_cache = PdfCache()
@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import functools
+import inspect
+import logging
+import pstats
+import random
+import re
+import threading
+import tracemalloc
+from contextvars import ContextVar
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+import anyio
+from fastapi.routing import APIRoute
+
+from app.services.paths import ensure_app_dirs
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_FILE_PATTERN = re.compile(r"^[\w.-]+\.(prof|stacks|tracemalloc)$")
+PROFILE_KEEP_CAPTURES = 50
+_STACK_MIN_SECONDS = 1e-6
+_STACK_MAX_DEPTH = 64
+
+logger = logging.getLogger("receipt_app.profiling")
+
+
+def profiles_dir() -> Path:
+    folder = ensure_app_dirs()["logs_dir"] / "profiles"
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder
+
+
+class Capture:
+    def __init__(self, method: str, path: str):
+        self.method = method
+        self.path = path
+        self.started_at = datetime.now()
+        self.profile = cProfile.Profile()
+        self.snapshot: tracemalloc.Snapshot | None = None
+
+    @property
+    def basename(self) -> str:
+        slug = re.sub(r"[^\w]+", "-", self.path).strip("-") or "root"
+        return f"{self.started_at:%Y%m%d-%H%M%S-%f}-{self.method.lower()}-{slug}"
+
+
+class Profiler:
+    def __init__(self) -> None:
+        self.enabled = False
+        self.sample_rate = 0.0
+        self._tracing_users = 0
+        self._lock = threading.Lock()
+
+    def configure(self, enabled: bool, sample_rate: float) -> None:
+        self.sample_rate = min(max(sample_rate, 0.0), 1.0)
+        self.enabled = enabled and self.sample_rate > 0
+
+    def start_tracing(self) -> None:
+        with self._lock:
+            if self._tracing_users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+            self._tracing_users += 1
+
+    def stop_tracing(self) -> tracemalloc.Snapshot | None:
+        with self._lock:
+            snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+            self._tracing_users -= 1
+            if self._tracing_users == 0:
+                tracemalloc.stop()
+            return snapshot
+
+    def should_sample(self, scope: dict) -> bool:
+        path = scope.get("path", "")
+        if not path.startswith("/api/") or path.startswith("/api/profiles"):
+            return False
+        for name, value in scope.get("headers", ()):
+            if name == PROFILE_HEADER:
+                return value not in {b"", b"0", b"false"}
+        return self.enabled and random.random() < self.sample_rate
+
+
+profiler = Profiler()
+_current_capture: ContextVar[Capture | None] = ContextVar("profiling_capture", default=None)
+
+
+class ProfilingMiddleware:
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http" or not profiler.should_sample(scope):
+            await self.app(scope, receive, send)
+            return
+
+        capture = Capture(scope["method"], scope["path"])
+        token = _current_capture.set(capture)
+        profiler.start_tracing()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            capture.snapshot = profiler.stop_tracing()
+            _current_capture.reset(token)
+            await anyio.to_thread.run_sync(write_capture, capture)
+
+
+def _enable_profile(capture: Capture) -> bool:
+    try:
+        capture.profile.enable()
+    except ValueError:
+        # Python 3.12+ allows a single active profiler per interpreter, so a
+        # concurrent sampled request loses its call profile but still completes.
+        logger.warning(
+            "Skipping call profile for %s %s: another profiler is active",
+            capture.method,
+            capture.path,
+        )
+        return False
+    return True
+
+
+class ProfiledRoute(APIRoute):
+    # Sync endpoints run in a worker thread, outside the middleware's thread, so
+    # the profiler is switched on around the endpoint call itself.
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        if asyncio.iscoroutinefunction(endpoint):
+
+            @functools.wraps(endpoint)
+            async def wrapped(*args: Any, **kw: Any) -> Any:
+                capture = _current_capture.get()
+                if capture is None or not _enable_profile(capture):
+                    return await endpoint(*args, **kw)
+                try:
+                    return await endpoint(*args, **kw)
+                finally:
+                    capture.profile.disable()
+
+        else:
+
+            @functools.wraps(endpoint)
+            def wrapped(*args: Any, **kw: Any) -> Any:
+                capture = _current_capture.get()
+                if capture is None or not _enable_profile(capture):
+                    return endpoint(*args, **kw)
+                try:
+                    return endpoint(*args, **kw)
+                finally:
+                    capture.profile.disable()
+
+        # The wrapper lives in this module, so FastAPI releases that resolve string
+        # annotations against ``call.__globals__`` would miss the endpoint's names.
+        # Resolving them here keeps dependency injection identical on every release.
+        wrapped.__signature__ = inspect.signature(endpoint, eval_str=True)  # type: ignore[attr-defined]
+        super().__init__(path, wrapped, **kwargs)
+
+
+def _frame_label(func: tuple[str, int, str]) -> str:
+    filename, lineno, name = func
+    if filename == "~":
+        return name.replace(";", ":")
+    return f"{Path(filename).name}:{lineno}({name})".replace(";", ":")
+
+
+def folded_stacks(stats: pstats.Stats) -> list[str]:
+    # cProfile only records caller/callee pairs, so full stacks are
+    # reconstructed by splitting each function's time across its callees.
+    raw = stats.stats  # type: ignore[attr-defined]
+    callees: dict[tuple, dict[tuple, float]] = {}
+    roots = []
+    for func, (_, _, _, cumulative, callers) in raw.items():
+        if not callers:
+            roots.append((func, cumulative))
+        for caller, edge in callers.items():
+            callees.setdefault(caller, {})[func] = edge[3]
+
+    totals: dict[str, float] = {}
+
+    def walk(func: tuple, stack: list[str], seen: set, value: float) -> None:
+        cumulative = raw[func][3]
+        ratio = value / cumulative if cumulative else 0.0
+        child_total = 0.0
+        if len(stack) < _STACK_MAX_DEPTH:
+            for child, edge_cumulative in callees.get(func, {}).items():
+                child_value = edge_cumulative * ratio
+                if child in seen or child_value < _STACK_MIN_SECONDS:
+                    continue
+                child_total += child_value
+                walk(child, stack + [_frame_label(child)], seen | {child}, child_value)
+        self_time = value - child_total
+        if self_time >= _STACK_MIN_SECONDS:
+            key = ";".join(stack)
+            totals[key] = totals.get(key, 0.0) + self_time
+
+    for func, cumulative in roots:
+        walk(func, [_frame_label(func)], {func}, cumulative)
+
+    # Weights are microseconds, the integer sample counts flamegraph tools expect.
+    return [f"{stack} {round(value * 1_000_000)}" for stack, value in sorted(totals.items())]
+
+
+def write_capture(capture: Capture) -> None:
+    folder = profiles_dir()
+    base = folder / capture.basename
+    try:
+        stats = pstats.Stats(capture.profile)
+    except TypeError:
+        stats = None  # Nothing ran under the profiler (e.g. a 404 before routing).
+    if stats is not None:
+        stats.dump_stats(f"{base}.prof")
+        Path(f"{base}.stacks").write_text("\n".join(folded_stacks(stats)) + "\n", encoding="utf-8")
+    if capture.snapshot is not None:
+        capture.snapshot.dump(f"{base}.tracemalloc")
+    _rotate(folder)
+
+
+def _rotate(folder: Path) -> None:
+    captures: dict[str, list[Path]] = {}
+    for path in folder.iterdir():
+        if PROFILE_FILE_PATTERN.match(path.name):
+            captures.setdefault(path.name.rsplit(".", 1)[0], []).append(path)
+    # Basenames start with a sortable timestamp, so the newest sort last.
+    for basename in sorted(captures)[:-PROFILE_KEEP_CAPTURES]:
+        for stale in captures[basename]:
+            stale.unlink(missing_ok=True)
+
+
+def list_captures() -> list[dict[str, Any]]:
+    entries = []
+    for path in sorted(profiles_dir().iterdir(), reverse=True):
+        if not PROFILE_FILE_PATTERN.match(path.name):
+            continue
+        stat = path.stat()
+        entries.append(
+            {
+                "name": path.name,
+                "size": stat.st_size,
+                "created_at": datetime.fromtimestamp(stat.st_mtime).isoformat(timespec="seconds"),
+                "url": f"/api/profiles/{path.name}",
+            }
+        )
+    return entries
+
+
+def capture_path(name: str) -> Path:
+    if not PROFILE_FILE_PATTERN.match(name):
+        raise ValueError("Profile not found")
+    path = profiles_dir() / name
+    if not path.is_file():
+        raise ValueError("Profile not found")
+    return path
@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session, selectinload
+
+from app import models
+from app.services.pdf import receipt_pdf_path, render_receipt_pdf_bytes, write_pdf_bytes
+
+logger = logging.getLogger("receipt_app.regenerate")
+
+
+# Plain, picklable stand-ins for the ORM rows so receipts can cross process
+# boundaries. They expose the attributes render_receipt_pdf reads.
+@dataclass(frozen=True)
+class ItemSnapshot:
+    item_name: str
+    amount_cents: int
+
+
+@dataclass(frozen=True)
+class ReceiptSnapshot:
+    id: int
+    receipt_number: str
+    student_name: str
+    student_class: str
+    department: str
+    total_cents: int
+    created_at: datetime
+    items: tuple[ItemSnapshot, ...]
+
+
+@dataclass(frozen=True)
+class SettingsSnapshot:
+    school_name: str
+    school_address: str
+    school_contact: str
+    currency_symbol: str
+    footer_text: str
+    default_pdf_folder: str
+
+
+def snapshot_receipt(receipt: models.Receipt) -> ReceiptSnapshot:
+    return ReceiptSnapshot(
+        id=receipt.id,
+        receipt_number=receipt.receipt_number,
+        student_name=receipt.student_name,
+        student_class=receipt.student_class,
+        department=receipt.department,
+        total_cents=receipt.total_cents,
+        created_at=receipt.created_at,
+        items=tuple(ItemSnapshot(item.item_name, item.amount_cents) for item in receipt.items),
+    )
+
+
+def snapshot_settings(settings: models.Setting) -> SettingsSnapshot:
+    return SettingsSnapshot(
+        school_name=settings.school_name,
+        school_address=settings.school_address,
+        school_contact=settings.school_contact,
+        currency_symbol=settings.currency_symbol,
+        footer_text=settings.footer_text,
+        default_pdf_folder=settings.default_pdf_folder,
+    )
+
+
+def settings_fingerprint(settings: SettingsSnapshot) -> str:
+    payload = json.dumps(asdict(settings), sort_keys=True).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def iter_receipt_chunks(
+    db: Session, after_id: int, chunk_size: int
+) -> Iterator[list[ReceiptSnapshot]]:
+    last_id = after_id
+    while True:
+        stmt = (
+            select(models.Receipt)
+            .options(selectinload(models.Receipt.items))
+            .where(models.Receipt.id > last_id)
+            .order_by(models.Receipt.id)
+            .limit(chunk_size)
+        )
+        receipts = db.scalars(stmt).all()
+        if not receipts:
+            return
+        chunk = [snapshot_receipt(receipt) for receipt in receipts]
+        # Drop the ORM rows so memory stays flat across the whole table.
+        db.expunge_all()
+        last_id = chunk[-1].id
+        yield chunk
+
+
+def render_chunk(
+    chunk: list[ReceiptSnapshot], settings: SettingsSnapshot
+) -> list[tuple[int, str]]:
+    results = []
+    for receipt in chunk:
+        data = render_receipt_pdf_bytes(receipt, settings)
+        pdf_path = write_pdf_bytes(receipt_pdf_path(receipt, settings), data)
+        results.append((receipt.id, str(pdf_path)))
+    return results
+
+
+def load_checkpoint(checkpoint_path: Path, fingerprint: str) -> int:
+    if not checkpoint_path.exists():
+        return 0
+    try:
+        checkpoint = json.loads(checkpoint_path.read_text(encoding="utf-8"))
+        last_id = int(checkpoint["last_id"])
+    except (ValueError, KeyError, TypeError):
+        logger.warning("Ignoring unreadable checkpoint %s", checkpoint_path)
+        return 0
+    if checkpoint.get("settings_hash") != fingerprint:
+        # Receipts done before the interruption carry the old header/footer.
+        logger.info("Settings changed since the checkpoint; starting over")
+        return 0
+    return last_id
+
+
+def save_checkpoint(checkpoint_path: Path, last_id: int, rendered: int, fingerprint: str) -> None:
+    tmp_path = checkpoint_path.with_suffix(".tmp")
+    tmp_path.write_text(
+        json.dumps(
+            {
+                "last_id": last_id,
+                "rendered": rendered,
+                "settings_hash": fingerprint,
+                "updated_at": datetime.now().isoformat(timespec="seconds"),
+            }
+        ),
+        encoding="utf-8",
+    )
+    tmp_path.replace(checkpoint_path)
+
+
+def regenerate_all_pdfs(
+    db: Session,
+    settings: models.Setting,
+    checkpoint_path: Path,
+    workers: int | None = None,
+    chunk_size: int = 200,
+    resume: bool = True,
+) -> int:
+    if settings.pdf_storage_mode == "memory":
+        # Memory-only receipts have no disk copy to refresh; the running app
+        # re-renders them on demand (saving settings already cleared its cache).
+        logger.info("PDF storage mode is memory-only; nothing to write to disk")
+        checkpoint_path.unlink(missing_ok=True)
+        return 0
+
+    settings_snapshot = snapshot_settings(settings)
+    fingerprint = settings_fingerprint(settings_snapshot)
+    after_id = load_checkpoint(checkpoint_path, fingerprint) if resume else 0
+    remaining = db.scalar(select(func.count(models.Receipt.id)).where(models.Receipt.id > after_id))
+    if after_id:
+        logger.info("Resuming after receipt id %s", after_id)
+    logger.info("Regenerating %s receipt PDFs", remaining)
+
+    rendered = 0
+    started = time.perf_counter()
+
+    def _commit(future: Future) -> None:
+        nonlocal rendered
+        results = future.result()
+        db.execute(
+            update(models.Receipt),
+            [{"id": receipt_id, "pdf_path": pdf_path} for receipt_id, pdf_path in results],
+        )
+        db.commit()
+        rendered += len(results)
+        save_checkpoint(checkpoint_path, results[-1][0], rendered, fingerprint)
+        elapsed = time.perf_counter() - started
+        logger.info(
+            "%s/%s receipts (%.1f/s)",
+            rendered,
+            remaining,
+            rendered / elapsed if elapsed else 0.0,
+        )
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Bound the number of chunks in flight and commit them in submission
+        # order, so the checkpoint never skips past an unfinished chunk.
+        max_pending = workers * 2
+        pending: deque[Future] = deque()
+        for chunk in iter_receipt_chunks(db, after_id, chunk_size):
+            pending.append(executor.submit(render_chunk, chunk, settings_snapshot))
+            while len(pending) >= max_pending:
+                _commit(pending.popleft())
+        while pending:
+            _commit(pending.popleft())
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        "Regenerated %s PDFs in %.1fs (%.1f/s)",
+        rendered,
+        elapsed,
+        rendered / elapsed if elapsed else 0.0,
+    )
+    checkpoint_path.unlink(missing_ok=True)
+    return rendered
@@ -4,6 +4,8 @@ const state = {
   settingsSnapshot: null,
   historyRows: [],
   currencySymbol: '₦',
+  suggestTimer: null,
+  idempotencyKey: null,
 };
 
 const el = {
@@ -20,6 +22,7 @@ const el = {
   receiptForm: document.getElementById('receipt-form'),
   expensesList: document.getElementById('expenses-list'),
   expenseTemplate: document.getElementById('expense-row-template'),
+  itemSuggestions: document.getElementById('item-suggestions'),
   addExpenseBtn: document.getElementById('add-expense-btn'),
   clearFormBtn: document.getElementById('clear-form-btn'),
   subtotalAmount: document.getElementById('subtotal-amount'),
@@ -48,6 +51,8 @@ const el = {
   settingsForm: document.getElementById('settings-form'),
   cancelSettingsBtn: document.getElementById('cancel-settings-btn'),
   statusMessage: document.getElementById('status-message'),
+  backupNowBtn: document.getElementById('backup-now-btn'),
+  backupStatus: document.getElementById('backup-status'),
 
   footerTotal: document.getElementById('footer-total'),
   footerCount: document.getElementById('footer-count'),
@@ -92,8 +97,8 @@ function applyCurrencySymbol(symbol) {
 
 function api(path, options = {}) {
   return fetch(path, {
-    headers: { 'Content-Type': 'application/json', ...(options.headers || {}) },
     ...options,
+    headers: { 'Content-Type': 'application/json', ...(options.headers || {}) },
   }).then(async (res) => {
     if (!res.ok) {
       let detail = 'Request failed';
@@ -221,6 +226,25 @@ function closeModal() {
   el.modal.classList.add('hidden');
 }
 
+function suggestItems(query) {
+  clearTimeout(state.suggestTimer);
+  state.suggestTimer = setTimeout(async () => {
+    try {
+      const params = new URLSearchParams({ q: query.trim() });
+      const names = await api(`/api/items/suggest?${params.toString()}`);
+      el.itemSuggestions.replaceChildren(
+        ...names.map((name) => {
+          const option = document.createElement('option');
+          option.value = name;
+          return option;
+        }),
+      );
+    } catch (_) {
+      // Suggestions are best-effort; typing still works without them.
+    }
+  }, 150);
+}
+
 function addExpenseRow(initial = { item_name: '', amount: '' }) {
   const fragment = el.expenseTemplate.content.cloneNode(true);
   const row = fragment.querySelector('.expense-row');
@@ -231,7 +255,11 @@ function addExpenseRow(initial = { item_name: '', amount: '' }) {
   itemInput.value = initial.item_name || '';
   amountInput.value = initial.amount || '';
 
-  itemInput.addEventListener('input', () => validateRequired(itemInput, 'Item name'));
+  itemInput.addEventListener('input', () => {
+    validateRequired(itemInput, 'Item name');
+    suggestItems(itemInput.value);
+  });
+  itemInput.addEventListener('focus', () => suggestItems(itemInput.value));
   amountInput.addEventListener('input', () => {
     validateAmount(amountInput);
     recalcTotal();
@@ -248,6 +276,7 @@ function addExpenseRow(initial = { item_name: '', amount: '' }) {
       confirmLabel: 'Delete',
       onConfirm: () => {
         row.remove();
+        state.idempotencyKey = null;
         recalcTotal();
       },
     });
@@ -259,6 +288,7 @@ function addExpenseRow(initial = { item_name: '', amount: '' }) {
 
 function resetReceiptForm() {
   el.receiptForm.reset();
+  state.idempotencyKey = null;
   el.expensesList.innerHTML = '';
   addExpenseRow();
   recalcTotal();
@@ -289,6 +319,13 @@ function receiptPayload() {
   };
 }
 
+function newIdempotencyKey() {
+  if (window.crypto && typeof window.crypto.randomUUID === 'function') {
+    return window.crypto.randomUUID();
+  }
+  return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+}
+
 function showSuccess(data) {
   state.latestReceipt = data;
   const r = data.receipt;
@@ -306,11 +343,16 @@ async function submitReceipt(event) {
     return;
   }
 
+  // Reused for retries and double-clicks until the form changes or succeeds.
+  if (!state.idempotencyKey) state.idempotencyKey = newIdempotencyKey();
+
   try {
     const result = await api('/api/receipts', {
       method: 'POST',
+      headers: { 'Idempotency-Key': state.idempotencyKey },
       body: JSON.stringify(receiptPayload()),
     });
+    state.idempotencyKey = null;
     showSuccess(result);
     loadReceiptHistory();
     showToast('Receipt generated successfully');
@@ -516,6 +558,14 @@ async function loadSettings() {
     document.getElementById('school-address').value = s.school_address || '';
     document.getElementById('footer-text').value = s.footer_text || '';
     document.getElementById('default-pdf-folder').value = s.default_pdf_folder || '';
+    document.getElementById('pdf-storage-mode').value = s.pdf_storage_mode || 'persisted';
+    document.getElementById('profiling-enabled').checked = Boolean(s.profiling_enabled);
+    document.getElementById('profiling-sample-rate').value = s.profiling_sample_rate ?? 0.1;
+    document.getElementById('backup-enabled').checked = s.backup_enabled ?? true;
+    document.getElementById('backup-interval-minutes').value = s.backup_interval_minutes ?? 60;
+    document.getElementById('backup-keep').value = s.backup_keep ?? 24;
+    document.getElementById('backup-pages-per-step').value = s.backup_pages_per_step ?? 64;
+    document.getElementById('backup-step-sleep-ms').value = s.backup_step_sleep_ms ?? 20;
     applyCurrencySymbol(s.currency_symbol || '₦');
     recalcTotal();
     if (state.historyRows.length) {
@@ -524,6 +574,7 @@ async function loadSettings() {
     }
     state.settingsSnapshot = JSON.stringify(s);
     el.statusMessage.classList.add('opacity-0');
+    loadBackupStatus();
   } catch (error) {
     showToast(error.message, 'error');
   }
@@ -538,7 +589,66 @@ function validateSettings() {
     setFieldError(currencySymbol, 'Currency symbol must be at most 3 characters');
     currencyOk = false;
   }
-  return nameOk && currencyOk;
+  const sampleRate = document.getElementById('profiling-sample-rate');
+  const rate = Number(sampleRate.value || 0);
+  let rateOk = true;
+  if (!Number.isFinite(rate) || rate < 0 || rate > 1) {
+    setFieldError(sampleRate, 'Sample rate must be between 0 and 1');
+    rateOk = false;
+  } else {
+    setFieldError(sampleRate, '');
+  }
+  const backupRanges = [
+    ['backup-interval-minutes', 5, 1440, 'Interval'],
+    ['backup-keep', 1, 500, 'Snapshots to keep'],
+    ['backup-pages-per-step', 1, 100000, 'Pages per step'],
+    ['backup-step-sleep-ms', 0, 5000, 'Pause per step'],
+  ];
+  let backupOk = true;
+  backupRanges.forEach(([id, min, max, label]) => {
+    const input = document.getElementById(id);
+    const value = Number(input.value);
+    if (!Number.isInteger(value) || value < min || value > max) {
+      setFieldError(input, `${label} must be a whole number from ${min} to ${max}`);
+      backupOk = false;
+    } else {
+      setFieldError(input, '');
+    }
+  });
+  return nameOk && currencyOk && rateOk && backupOk;
+}
+
+function describeBackupStatus(data) {
+  const { status, snapshots } = data;
+  if (status.state === 'running') {
+    const { pages_total: total, pages_remaining: remaining, restarts } = status;
+    const restarted = restarts ? ` (restarted ${restarts}x)` : '';
+    if (total) return `Backing up: ${Math.round(((total - remaining) / total) * 100)}%${restarted}`;
+    return `Backing up: ${status.phase || 'starting'}`;
+  }
+  if (status.state === 'failed') return `Last backup failed: ${status.error}`;
+  if (!snapshots.length) return 'No snapshots yet';
+  return `${snapshots.length} snapshot(s), latest ${new Date(snapshots[0].created_at).toLocaleString()}`;
+}
+
+async function loadBackupStatus() {
+  try {
+    const data = await api('/api/backups');
+    el.backupStatus.textContent = describeBackupStatus(data);
+    if (data.status.state === 'running') setTimeout(loadBackupStatus, 1000);
+  } catch (error) {
+    el.backupStatus.textContent = error.message;
+  }
+}
+
+async function startBackup() {
+  try {
+    await api('/api/backups', { method: 'POST' });
+    showToast('Backup started');
+  } catch (error) {
+    showToast(error.message, 'error');
+  }
+  loadBackupStatus();
 }
 
 async function saveSettings(event) {
@@ -555,6 +665,14 @@ async function saveSettings(event) {
     school_address: document.getElementById('school-address').value.trim(),
     footer_text: document.getElementById('footer-text').value.trim(),
     default_pdf_folder: document.getElementById('default-pdf-folder').value.trim(),
+    pdf_storage_mode: document.getElementById('pdf-storage-mode').value || 'persisted',
+    profiling_enabled: document.getElementById('profiling-enabled').checked,
+    profiling_sample_rate: Number(document.getElementById('profiling-sample-rate').value || 0),
+    backup_enabled: document.getElementById('backup-enabled').checked,
+    backup_interval_minutes: Number(document.getElementById('backup-interval-minutes').value || 60),
+    backup_keep: Number(document.getElementById('backup-keep').value || 24),
+    backup_pages_per_step: Number(document.getElementById('backup-pages-per-step').value || 64),
+    backup_step_sleep_ms: Number(document.getElementById('backup-step-sleep-ms').value || 0),
   };
 
   try {
@@ -590,6 +708,9 @@ function bindEvents() {
   el.addExpenseBtn.addEventListener('click', () => addExpenseRow());
   el.clearFormBtn.addEventListener('click', resetReceiptForm);
   el.receiptForm.addEventListener('submit', submitReceipt);
+  el.receiptForm.addEventListener('input', () => {
+    state.idempotencyKey = null;
+  });
 
   el.openPdfBtn.addEventListener('click', () => {
     if (!state.latestReceipt) return;
@@ -611,6 +732,7 @@ function bindEvents() {
   el.historyDetail.addEventListener('click', handleHistoryAction);
 
   el.settingsForm.addEventListener('submit', saveSettings);
+  el.backupNowBtn.addEventListener('click', startBackup);
   document.getElementById('currency-symbol').addEventListener('input', (event) => {
     const input = event.target;
     if (input.value.length > 3) {
@@ -626,6 +748,14 @@ function bindEvents() {
     document.getElementById('school-address').value = s.school_address || '';
     document.getElementById('footer-text').value = s.footer_text || '';
     document.getElementById('default-pdf-folder').value = s.default_pdf_folder || '';
+    document.getElementById('pdf-storage-mode').value = s.pdf_storage_mode || 'persisted';
+    document.getElementById('profiling-enabled').checked = Boolean(s.profiling_enabled);
+    document.getElementById('profiling-sample-rate').value = s.profiling_sample_rate ?? 0.1;
+    document.getElementById('backup-enabled').checked = s.backup_enabled ?? true;
+    document.getElementById('backup-interval-minutes').value = s.backup_interval_minutes ?? 60;
+    document.getElementById('backup-keep').value = s.backup_keep ?? 24;
+    document.getElementById('backup-pages-per-step').value = s.backup_pages_per_step ?? 64;
+    document.getElementById('backup-step-sleep-ms').value = s.backup_step_sleep_ms ?? 20;
     applyCurrencySymbol(s.currency_symbol || '₦');
     recalcTotal();
     if (state.historyRows.length) {
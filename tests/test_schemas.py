@@ -0,0 +1,90 @@
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+import pytest
+from hypothesis import given, settings
+from hypothesis import strategies as st
+from pydantic import ValidationError
+
+from app.schemas import ReceiptCreate, ReceiptItemCreate, normalize_amount_to_cents
+
+
+def decimal_amount_to_cents(value):
+    # The Decimal-only implementation the integer fast path replaced.
+    try:
+        dec = Decimal(str(value)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+    except (InvalidOperation, ValueError):
+        raise ValueError("Amount must be numeric")
+
+    if dec < 0:
+        raise ValueError("Amount cannot be negative")
+    return int(dec * 100)
+
+
+def outcome(func, value):
+    try:
+        return "ok", func(value)
+    except Exception as exc:
+        return type(exc), str(exc)
+
+
+digits = st.text(alphabet="0123456789", max_size=30)
+amount_text = st.one_of(
+    st.builds(lambda whole, fraction: f"{whole}.{fraction}", digits, digits),
+    digits,
+    st.from_regex(r"\A[-+ ]?\d{0,20}(\.\d{0,6})?([eE][-+]?\d{1,3})?[ ]?\Z"),
+    st.text(alphabet="0123456789.-+eE _,٣", max_size=12),
+    st.text(max_size=8),
+)
+
+
+@settings(max_examples=2000)
+@given(amount_text)
+def test_matches_decimal_implementation(value):
+    assert outcome(normalize_amount_to_cents, value) == outcome(decimal_amount_to_cents, value)
+
+
+@given(st.one_of(st.integers(), st.decimals(allow_nan=True, allow_infinity=True), st.floats()))
+def test_matches_decimal_implementation_for_numbers(value):
+    assert outcome(normalize_amount_to_cents, value) == outcome(decimal_amount_to_cents, value)
+
+
+@pytest.mark.parametrize(
+    ("amount", "cents"),
+    [("0", 0), ("12", 1200), ("12.3", 1230), ("12.345", 1235), ("12.344", 1234), (".5", 50)],
+)
+def test_item_exposes_parsed_cents(amount, cents):
+    assert ReceiptItemCreate(item_name="Fee", amount=amount).amount_cents == cents
+
+
+@pytest.mark.parametrize(
+    ("amount", "message"),
+    [("abc", "Amount must be numeric"), ("-1", "Amount cannot be negative")],
+)
+def test_invalid_amount_reports_field_location(amount, message):
+    with pytest.raises(ValidationError) as info:
+        ReceiptCreate(
+            student_name="Ada",
+            student_class="JSS1",
+            items=[{"item_name": "Fee", "amount": "1"}, {"item_name": "Bus", "amount": amount}],
+        )
+    (error,) = info.value.errors()
+    assert error["loc"] == ("items", 1, "amount")
+    assert error["msg"] == f"Value error, {message}"
+
+
+def test_total_cents_sums_items():
+    payload = ReceiptCreate(
+        student_name="Ada",
+        student_class="JSS1",
+        items=[{"item_name": "Fee", "amount": "1500.50"}, {"item_name": "Bus", "amount": "0.255"}],
+    )
+    assert payload.total_cents == 150076
+
+
+def test_invalid_name_and_amount_are_reported_together():
+    with pytest.raises(ValidationError) as info:
+        ReceiptItemCreate(item_name="  ", amount="abc")
+    assert [(error["loc"], error["msg"]) for error in info.value.errors()] == [
+        (("item_name",), "Value error, Item name is required"),
+        (("amount",), "Value error, Amount must be numeric"),
+    ]